@@ -0,0 +1,29 @@
+"""
+Configuración de gunicorn para servir el dashboard en Railway.
+
+El dashboard se sirve con varios workers e hilos. El bot de monitoreo corre
+aparte, en un único proceso propio lanzado por el proceso maestro, para que
+el matching de OpenCV no frene las respuestas HTTP.
+"""
+import os
+import subprocess
+import sys
+
+bind = f"0.0.0.0:{os.getenv('PORT', 8080)}"
+workers = 2
+threads = 4
+worker_class = 'gthread'
+
+_bot_process = None
+
+
+def on_starting(server):
+    """Lanza el bot una sola vez, antes de crear los workers."""
+    global _bot_process
+    _bot_process = subprocess.Popen([sys.executable, 'web_server.py', '--bot'])
+
+
+def on_exit(server):
+    """Detiene el bot al apagar el servidor."""
+    if _bot_process is not None:
+        _bot_process.terminate()
@@ -2,6 +2,7 @@
 Script principal del bot de monitoreo de logos en Twitch.
 Ejecuta chequeos periódicos, genera reportes y limpia datos antiguos.
 """
+import gzip
 import os
 import webbrowser
 import schedule
@@ -12,6 +13,8 @@ from dotenv import load_dotenv
 
 from src.stream_monitor import StreamMonitor
 from src.report_generator import ReportGenerator
+from src import fast_json
+from src.fs_utils import ensure_dir
 
 # Cargar variables de entorno
 load_dotenv()
@@ -19,7 +22,13 @@ load_dotenv()
 
 def cleanup_old_data(days=30):
     """
-    Elimina detecciones y capturas más antiguas que el número de días especificado.
+    Archiva las detecciones más antiguas que el número de días especificado y
+    elimina sus capturas.
+    
+    Las detecciones se sacan del historial y se agregan comprimidas a
+    data/archive/detections_AAAAMM.jsonl.gz (por mes), y sus contadores se
+    suman a data/stats_cumulative.json para que el dashboard las siga
+    contando.
     
     Args:
         days: Número de días de retención
@@ -28,57 +37,211 @@ def cleanup_old_data(days=30):
     print(f"Limpiando datos antiguos (>{days} días)")
     print(f"{'='*60}")
     
-    data_file = Path('data/detections.json')
+    data_file = Path('data/detections.jsonl')
     screenshots_dir = Path('reports/screenshots')
+    pending_file = data_file.parent / 'archive' / 'pending.jsonl'
     
     if not data_file.exists():
         print("✓ No hay datos para limpiar")
         return
     
-    import json
-    
-    # Cargar detecciones
-    with open(data_file, 'r', encoding='utf-8') as f:
-        detections = json.load(f)
+    # Si una limpieza anterior se interrumpió, terminar de archivar lo que dejó
+    # pendiente antes de separar detecciones nuevas
+    old_screenshots = set()
+    if pending_file.exists():
+        old_screenshots |= _resume_pending_archive(pending_file, data_file)
     
     # Calcular fecha límite
     cutoff_date = datetime.now() - timedelta(days=days)
     
-    # Filtrar detecciones recientes
-    original_count = len(detections)
-    recent_detections = []
-    old_screenshots = []
+    # Recorrer las detecciones línea por línea y copiar las recientes a un
+    # archivo temporal y las viejas al archivo de pendientes de archivar, sin
+    # cargar el historial completo en memoria
+    original_count = 0
+    recent_count = 0
+    read_bytes = 0
+    kept_bytes = 0
+    tmp_file = data_file.with_name(data_file.name + '.tmp')
+    tmp_pending_file = pending_file.with_name(pending_file.name + '.tmp')
+    ensure_dir(pending_file.parent)
+    
+    with open(data_file, 'rb') as f, open(tmp_file, 'wb') as out, open(tmp_pending_file, 'wb') as expired:
+        for line in f:
+            read_bytes += len(line)
+            if not line.strip():
+                continue
+            try:
+                detection = fast_json.loads(line)
+            except fast_json.JSONDecodeError:
+                # Línea incompleta (p. ej. escritura interrumpida)
+                continue
+            original_count += 1
+            if not line.endswith(b'\n'):
+                line += b'\n'
+            detection_date = datetime.fromisoformat(detection['timestamp'])
+            if detection_date > cutoff_date:
+                out.write(line)
+                recent_count += 1
+                kept_bytes += len(line)
+            else:
+                expired.write(line)
+    
+    removed_count = original_count - recent_count
+    
+    # Las detecciones viejas quedan guardadas aparte antes de reemplazar el
+    # historial. Si el proceso se corta entre los dos pasos, la próxima
+    # limpieza ve que el historial no cambió y descarta el pendiente; si se
+    # corta después, lo retoma. Ningún paso se aplica dos veces.
+    if removed_count:
+        os.replace(tmp_pending_file, pending_file)
+    else:
+        tmp_pending_file.unlink()
     
-    for detection in detections:
-        detection_date = datetime.fromisoformat(detection['timestamp'])
-        if detection_date > cutoff_date:
-            recent_detections.append(detection)
-        else:
-            # Marcar screenshots para eliminar
-            old_screenshots.append(detection.get('thumbnail'))
-            old_screenshots.append(detection.get('annotated'))
+    # Reemplazar el archivo original por el filtrado
+    os.replace(tmp_file, data_file)
     
-    # Guardar solo detecciones recientes
-    with open(data_file, 'w', encoding='utf-8') as f:
-        json.dump(recent_detections, f, indent=2, ensure_ascii=False)
+    # Si el archivo cambió (detecciones vencidas, pero también líneas vacías o
+    # incompletas descartadas), el offset del snapshot de estadísticas del
+    # dashboard ya no apunta al mismo lugar
+    if kept_bytes != read_bytes:
+        data_file.with_name('stats.json').unlink(missing_ok=True)
     
-    removed_count = original_count - len(recent_detections)
-    print(f"✓ Detecciones eliminadas: {removed_count}")
+    if removed_count:
+        old_screenshots |= _archive_pending(pending_file, data_file)
     
-    # Eliminar screenshots antiguos
+    print(f"✓ Detecciones archivadas: {removed_count}")
+    
+    # Eliminar screenshots antiguos recorriendo el directorio una sola vez
     deleted_files = 0
     if screenshots_dir.exists():
-        for screenshot_name in old_screenshots:
-            if screenshot_name:
-                screenshot_path = screenshots_dir / screenshot_name
-                if screenshot_path.exists():
+        for screenshot_path in screenshots_dir.iterdir():
+            if screenshot_path.name in old_screenshots:
+                try:
                     screenshot_path.unlink()
                     deleted_files += 1
+                except FileNotFoundError:
+                    pass
     
     print(f"✓ Capturas eliminadas: {deleted_files}")
     print(f"{'='*60}\n")
 
 
+def _resume_pending_archive(pending_file, data_file):
+    """
+    Retoma un archivado que una limpieza anterior dejó a medias.
+    
+    El pendiente contiene el comienzo del historial de ese momento. Si el
+    historial todavía empieza con la misma línea, la limpieza se cortó antes
+    de reemplazarlo: el pendiente se descarta y la limpieza actual vuelve a
+    separar esas detecciones. Si no, el historial ya se reemplazó y falta
+    archivar el pendiente.
+    
+    Args:
+        pending_file: Archivo con las detecciones pendientes de archivar
+        data_file: Archivo de detecciones
+        
+    Returns:
+        Conjunto con los nombres de las capturas a eliminar
+    """
+    with open(pending_file, 'rb') as f:
+        pending_head = f.readline()
+    with open(data_file, 'rb') as f:
+        history_head = f.readline()
+    
+    if pending_head and pending_head == history_head:
+        pending_file.unlink()
+        return set()
+    return _archive_pending(pending_file, data_file)
+
+
+def _archive_pending(pending_file, data_file):
+    """
+    Suma las detecciones pendientes a los contadores acumulados, las agrega al
+    archivo comprimido de su mes y borra el pendiente.
+    
+    Los dos pasos se pueden repetir sin duplicar nada: los contadores y cada
+    archivo mensual ignoran las detecciones que no son posteriores a la
+    última que ya tienen.
+    
+    Args:
+        pending_file: Archivo con las detecciones pendientes de archivar
+        data_file: Archivo de detecciones (junto al que están los contadores)
+        
+    Returns:
+        Conjunto con los nombres de las capturas de las detecciones archivadas
+    """
+    ReportGenerator(data_file).archive_statistics(_iter_jsonl(pending_file))
+    
+    # El snapshot de estadísticas del dashboard se calculó con los contadores
+    # acumulados anteriores: ya no corresponde
+    data_file.with_name('stats.json').unlink(missing_ok=True)
+    
+    screenshots = set()
+    month = None
+    archive = None
+    with open(pending_file, 'rb') as f:
+        for line in f:
+            detection = fast_json.loads(line)
+            screenshots.update(detection.get(key) for key in ('thumbnail', 'annotated', 'preview'))
+            
+            # El pendiente está en orden cronológico: los meses van seguidos
+            timestamp = datetime.fromisoformat(detection['timestamp'])
+            if timestamp.strftime('%Y%m') != month:
+                if archive is not None:
+                    archive.close()
+                month = timestamp.strftime('%Y%m')
+                archive = _MonthlyArchive(pending_file.parent / f'detections_{month}.jsonl.gz')
+            archive.add(line, timestamp)
+    if archive is not None:
+        archive.close()
+    
+    pending_file.unlink()
+    screenshots.discard(None)
+    return screenshots
+
+
+def _iter_jsonl(path):
+    """Recorre las detecciones de un archivo JSON Lines una a una."""
+    with open(path, 'rb') as f:
+        for line in f:
+            yield fast_json.loads(line)
+
+
+class _MonthlyArchive:
+    """
+    Archivo comprimido de las detecciones de un mes, reescrito de una vez.
+    
+    El contenido anterior se copia a un temporal, se agregan las detecciones
+    posteriores a la última ya archivada y el temporal reemplaza al original
+    al cerrar, así un corte nunca deja el archivo a medio escribir.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path.with_name(path.name + '.tmp')
+        self.out = gzip.open(self.tmp_path, 'wb')
+        self.archived_until = None
+        
+        if path.exists():
+            last_line = None
+            with gzip.open(path, 'rb') as existing:
+                for last_line in existing:
+                    self.out.write(last_line)
+            if last_line:
+                self.archived_until = datetime.fromisoformat(
+                    fast_json.loads(last_line)['timestamp'])
+    
+    def add(self, line, timestamp):
+        """Agrega una detección si todavía no está archivada."""
+        if self.archived_until is None or timestamp > self.archived_until:
+            self.out.write(line)
+    
+    def close(self):
+        """Termina de escribir y reemplaza el archivo mensual."""
+        self.out.close()
+        os.replace(self.tmp_path, self.path)
+
+
 def run_monitoring_cycle():
     """Ejecuta un ciclo completo de monitoreo."""
     try:
@@ -178,8 +341,13 @@ def main():
     # Loop principal
     try:
         while True:
+            # Dormir exactamente hasta la próxima tarea programada
+            idle_seconds = schedule.idle_seconds()
+            if idle_seconds is None:
+                break
+            if idle_seconds > 0:
+                time.sleep(idle_seconds)
             schedule.run_pending()
-            time.sleep(60)  # Chequear cada minuto si hay tareas pendientes
     except KeyboardInterrupt:
         print("\n\n👋 Bot detenido por el usuario")
         print("Hasta luego!")
@@ -0,0 +1,43 @@
+"""
+Serialización JSON rápida con orjson, con la librería estándar como respaldo.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él se usa json (más lento)
+    orjson = None
+
+# orjson.JSONDecodeError hereda de json.JSONDecodeError, así que capturar esta
+# excepción funciona con cualquiera de las dos implementaciones
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(data):
+    """
+    Decodifica un documento JSON.
+
+    Args:
+        data: Texto o bytes UTF-8 con el JSON
+
+    Returns:
+        Objeto Python decodificado
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj):
+    """
+    Codifica un objeto como JSON compacto en UTF-8.
+
+    Args:
+        obj: Objeto a serializar
+
+    Returns:
+        bytes con el JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
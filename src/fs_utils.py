@@ -0,0 +1,23 @@
+"""
+Utilidades de sistema de archivos compartidas por los módulos del bot.
+"""
+from pathlib import Path
+
+# Directorios que ya se crearon (o se comprobó que existen) en este proceso
+_DIRS_INITIALIZED = set()
+
+
+def ensure_dir(path):
+    """
+    Crea un directorio (y sus padres) si no existe, una sola vez por proceso.
+
+    Las llamadas siguientes con la misma ruta no tocan el disco, así que se
+    puede usar en caminos que se ejecutan en cada chequeo o en cada render.
+
+    Args:
+        path: Ruta del directorio
+    """
+    path = Path(path)
+    if path not in _DIRS_INITIALIZED:
+        path.mkdir(parents=True, exist_ok=True)
+        _DIRS_INITIALIZED.add(path)
@@ -1,23 +1,42 @@
 """
 Detector de logo usando OpenCV con template matching multi-escala.
 """
+import os
 import cv2
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Margen (en píxeles a resolución completa) alrededor del candidato encontrado
+# en la búsqueda a baja resolución, para absorber el error de posición
+REFINE_MARGIN = 8
+
+# Varianza mínima de gris que debe tener una región para considerarla como
+# candidata. En zonas planas (barras negras, fondos de color sólido) la
+# correlación normalizada es inestable y puede dar picos falsos.
+MIN_REGION_VARIANCE = 20.0
+
+# Tamaño y calidad de la miniatura WebP que muestra el dashboard (la imagen
+# anotada completa solo se abre al hacer clic)
+PREVIEW_SIZE = (320, 180)
+PREVIEW_WEBP_QUALITY = 70
+
 
 class LogoDetector:
     """Detecta logos en imágenes usando template matching."""
     
-    def __init__(self, logo_path, threshold=0.6):
+    def __init__(self, logo_path, threshold=0.6, early_exit=True):
         """
         Inicializa el detector de logos.
         
         Args:
             logo_path: Ruta a la imagen del logo de referencia
             threshold: Umbral de confianza para la detección (0-1)
+            early_exit: Si es True, deja de probar escalas en cuanto un match
+                supera el umbral y deja de mejorar
         """
         self.threshold = threshold
+        self.early_exit = early_exit
         self.logo_template = None
         
         logo_file = Path(logo_path)
@@ -31,6 +50,23 @@ class LogoDetector:
         
         self.logo_gray = cv2.cvtColor(self.logo_template, cv2.COLOR_BGR2GRAY)
         self.logo_height, self.logo_width = self.logo_gray.shape
+        
+        # Precalcular el template redimensionado para cada escala (50% a 150%)
+        # una sola vez, en lugar de redimensionarlo en cada detección.
+        # Las escalas se ordenan empezando por las más cercanas a 1.0, que son
+        # las más probables, alternando una por debajo y otra por encima, para
+        # poder cortar la búsqueda antes. Cada escala guarda además el template a
+        # mitad de tamaño, usado en la búsqueda gruesa sobre la imagen reducida.
+        scales = sorted(np.linspace(0.5, 1.5, 20), key=lambda s: (round(abs(s - 1.0), 6), s))
+        self.template_pyramid = []
+        for scale in scales:
+            width = int(self.logo_width * scale)
+            height = int(self.logo_height * scale)
+            resized_template = cv2.resize(self.logo_gray, (width, height),
+                                          interpolation=cv2.INTER_AREA)
+            small_template = cv2.resize(self.logo_gray, (width // 2, height // 2),
+                                        interpolation=cv2.INTER_AREA)
+            self.template_pyramid.append((scale, width, height, resized_template, small_template))
     
     def detect(self, image_path):
         """
@@ -51,43 +87,117 @@ class LogoDetector:
         # Cargar imagen
         image = cv2.imread(str(image_path))
         if image is None:
-            return {
-                'detected': False,
-                'confidence': 0.0,
-                'location': None,
-                'scale': None
-            }
+            return self._empty_result()
         
+        return self._detect_array(image)
+    
+    def detect_and_annotate(self, image_path, output_path, preview_path=None):
+        """
+        Detecta el logo y guarda la imagen anotada decodificando la imagen una
+        sola vez (equivale a detect() seguido de draw_detection()).
+        
+        Args:
+            image_path: Ruta a la imagen donde buscar el logo
+            output_path: Ruta donde guardar la imagen anotada
+            preview_path: Ruta opcional donde guardar además una miniatura WebP
+                de la imagen anotada (PREVIEW_SIZE)
+            
+        Returns:
+            Diccionario con resultado de detección, como detect()
+        """
+        image = cv2.imread(str(image_path))
+        if image is None:
+            return self._empty_result()
+        
+        detection_result = self._detect_array(image)
+        self._draw_array(image, detection_result, output_path)
+        if preview_path is not None:
+            preview = cv2.resize(image, PREVIEW_SIZE, interpolation=cv2.INTER_AREA)
+            cv2.imwrite(str(preview_path), preview, [cv2.IMWRITE_WEBP_QUALITY, PREVIEW_WEBP_QUALITY])
+        return detection_result
+    
+    @staticmethod
+    def _empty_result():
+        """Resultado de detección sin logo (imagen ilegible o sin contenido)."""
+        return {
+            'detected': False,
+            'confidence': 0.0,
+            'location': None,
+            'scale': None
+        }
+    
+    def _detect_array(self, image):
+        """
+        Detecta el logo en una imagen ya decodificada.
+        
+        Args:
+            image: Imagen BGR (np.ndarray)
+            
+        Returns:
+            Diccionario con resultado de detección, como detect()
+        """
         image_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         
+        # Búsqueda gruesa: imagen y templates a mitad de resolución, lo que
+        # reduce ~4x el costo de cada escala
+        image_small = cv2.pyrDown(image_gray)
+        
+        # Imágenes integrales (suma y suma de cuadrados) para medir en O(1) la
+        # varianza de cualquier ventana. Si toda la imagen es plana (p. ej.
+        # una pantalla negra) no hay nada que buscar.
+        sum_img, sqsum_img = cv2.integral2(image_small, sdepth=cv2.CV_64F)
+        small_height, small_width = image_small.shape
+        if self._window_variance(sum_img, sqsum_img, 0, 0,
+                                 small_width, small_height) < MIN_REGION_VARIANCE:
+            return self._empty_result()
+        
         # Realizar template matching en múltiples escalas
-        best_match = None
         best_confidence = 0
-        best_scale = 1.0
-        best_location = None
+        best_entry = None
+        best_loc_small = None
+        stale_scales = 0
         
-        # Probar diferentes escalas (50% a 150% del tamaño original)
-        scales = np.linspace(0.5, 1.5, 20)
-        
-        for scale in scales:
-            # Redimensionar template
-            width = int(self.logo_width * scale)
-            height = int(self.logo_height * scale)
-            
+        # Probar las escalas precalculadas del template
+        for entry in self.template_pyramid:
+            scale, width, height, resized_template, small_template = entry
             if width > image_gray.shape[1] or height > image_gray.shape[0]:
                 continue
             
-            resized_template = cv2.resize(self.logo_gray, (width, height))
-            
-            # Template matching
-            result = cv2.matchTemplate(image_gray, resized_template, cv2.TM_CCOEFF_NORMED)
+            # Template matching. Para templates grandes OpenCV ya calcula la
+            # correlación por DFT, así que no hace falta una versión FFT propia.
+            result = cv2.matchTemplate(image_small, small_template, cv2.TM_CCOEFF_NORMED)
             min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
             
-            # Si encontramos un mejor match
-            if max_val > best_confidence:
+            # Si encontramos un mejor match (descartando picos en zonas planas)
+            prev_best = best_confidence
+            template_height, template_width = small_template.shape
+            if max_val > best_confidence and self._window_variance(
+                    sum_img, sqsum_img, max_loc[0], max_loc[1],
+                    template_width, template_height) >= MIN_REGION_VARIANCE:
                 best_confidence = max_val
-                best_location = (*max_loc, width, height)
-                best_scale = scale
+                best_entry = entry
+                best_loc_small = max_loc
+            
+            # Cortar si ya superamos el umbral y las dos últimas escalas (una a
+            # cada lado de 1.0) no mejoraron el match de forma apreciable
+            stale_scales = stale_scales + 1 if best_confidence - prev_best < 0.01 else 0
+            if self.early_exit and best_confidence >= self.threshold and stale_scales >= 2:
+                break
+        
+        best_scale = None
+        best_location = None
+        if best_entry is not None:
+            # Refinamiento: repetir el matching a resolución completa solo en la
+            # región alrededor del candidato y con la escala ganadora
+            best_scale, width, height, resized_template, _ = best_entry
+            x0 = max(best_loc_small[0] * 2 - REFINE_MARGIN, 0)
+            y0 = max(best_loc_small[1] * 2 - REFINE_MARGIN, 0)
+            roi = image_gray[y0:y0 + height + 2 * REFINE_MARGIN,
+                             x0:x0 + width + 2 * REFINE_MARGIN]
+            result = cv2.matchTemplate(roi, resized_template, cv2.TM_CCOEFF_NORMED)
+            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+            best_confidence = max_val
+            best_location = (x0 + max_loc[0], y0 + max_loc[1], width, height)
         
         # Verificar si supera el umbral
         detected = best_confidence >= self.threshold
@@ -99,6 +209,38 @@ class LogoDetector:
             'scale': float(best_scale) if detected else None
         }
     
+    @staticmethod
+    def _window_variance(sum_img, sqsum_img, x, y, width, height):
+        """Varianza de la ventana (x, y, width, height) a partir de imágenes integrales."""
+        area = width * height
+        window_sum = (sum_img[y + height, x + width] - sum_img[y, x + width]
+                      - sum_img[y + height, x] + sum_img[y, x])
+        window_sqsum = (sqsum_img[y + height, x + width] - sqsum_img[y, x + width]
+                        - sqsum_img[y + height, x] + sqsum_img[y, x])
+        mean = window_sum / area
+        return window_sqsum / area - mean * mean
+    
+    def detect_and_annotate_many(self, jobs):
+        """
+        Ejecuta detect_and_annotate() sobre varias imágenes en paralelo.
+        
+        cv2.matchTemplate y la codificación de imágenes liberan el GIL, así que
+        los hilos aprovechan todos los núcleos y solapan la lectura de una
+        imagen con el matching de otra. Los templates precalculados solo se
+        leen, por lo que no hace falta bloquear.
+        
+        Args:
+            jobs: Lista de tuplas (image_path, output_path, preview_path)
+            
+        Returns:
+            Lista con el resultado de detect_and_annotate() para cada tupla, en
+            el mismo orden
+        """
+        if not jobs:
+            return []
+        with ThreadPoolExecutor(max_workers=min(os.cpu_count() or 1, len(jobs))) as executor:
+            return list(executor.map(lambda job: self.detect_and_annotate(*job), jobs))
+    
     def draw_detection(self, image_path, detection_result, output_path):
         """
         Dibuja un rectángulo alrededor del logo detectado.
@@ -115,6 +257,19 @@ class LogoDetector:
         if image is None:
             return False
         
+        self._draw_array(image, detection_result, output_path)
+        return True
+    
+    def _draw_array(self, image, detection_result, output_path):
+        """
+        Dibuja el resultado de detección sobre una imagen ya decodificada y la
+        guarda. La imagen se modifica en el lugar.
+        
+        Args:
+            image: Imagen BGR (np.ndarray)
+            detection_result: Resultado del método detect()
+            output_path: Ruta donde guardar la imagen anotada
+        """
         if detection_result['detected'] and detection_result['location']:
             x, y, w, h = detection_result['location']
             
@@ -133,4 +288,3 @@ class LogoDetector:
         
         # Guardar imagen
         cv2.imwrite(str(output_path), image)
-        return True
@@ -1,144 +1,422 @@
 """
 Generador de dashboard HTML con estadísticas y visualización de detecciones.
 """
-import json
+import gzip
+import hashlib
+import os
+import shutil
 from datetime import datetime
+from operator import itemgetter
 from pathlib import Path
-from collections import defaultdict
+from collections import deque
+from jinja2 import DictLoader, Environment, FileSystemBytecodeCache
+from markupsafe import Markup
 
+from . import fast_json
+from .fs_utils import ensure_dir
 
-class ReportGenerator:
-    """Genera reportes HTML del monitoreo de logos."""
-    
-    def __init__(self, detections_file='data/detections.json'):
-        """
-        Inicializa el generador de reportes.
-        
-        Args:
-            detections_file: Ruta al archivo JSON con detecciones
-        """
-        self.detections_file = Path(detections_file)
-        self.detections = self._load_detections()
-    
-    def _load_detections(self):
-        """Carga las detecciones desde el archivo JSON."""
-        if self.detections_file.exists():
-            try:
-                with open(self.detections_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                return []
-        return []
+# Cantidad máxima de detecciones (las más recientes) que muestra el historial
+MAX_DASHBOARD_ROWS = 500
+
+# Bytes del comienzo del archivo de detecciones que se guardan en el snapshot de
+# estadísticas para reconocer si el archivo fue reescrito (p. ej. por la limpieza)
+SNAPSHOT_HEAD_BYTES = 256
+
+# Directorio donde Jinja guarda la plantilla del dashboard ya compilada
+JINJA_CACHE_DIR = Path('.jinja_cache')
+
+
+def _format_timestamp(timestamp):
+    """
+    Convierte un timestamp ISO ('2024-01-02T15:04:05.123456') al formato
+    'YYYY-MM-DD HH:MM:SS' del dashboard.
     
-    def _calculate_statistics(self):
-        """Calcula estadísticas generales de las detecciones."""
-        if not self.detections:
-            return {
-                'total_checks': 0,
-                'logo_detected': 0,
-                'logo_not_detected': 0,
-                'detection_rate': 0.0,
-                'streamers_stats': {}
-            }
-        
-        total = len(self.detections)
-        detected = sum(1 for d in self.detections if d['logo_detected'])
-        
-        # Estadísticas por streamer
-        streamers_stats = defaultdict(lambda: {'total': 0, 'detected': 0, 'not_detected': 0})
-        
-        for detection in self.detections:
-            streamer = detection['streamer']
-            streamers_stats[streamer]['total'] += 1
-            if detection['logo_detected']:
-                streamers_stats[streamer]['detected'] += 1
-            else:
-                streamers_stats[streamer]['not_detected'] += 1
-        
-        # Calcular porcentajes
-        for streamer in streamers_stats:
-            total_checks = streamers_stats[streamer]['total']
-            detected_count = streamers_stats[streamer]['detected']
-            streamers_stats[streamer]['rate'] = (detected_count / total_checks * 100) if total_checks > 0 else 0
-        
-        return {
-            'total_checks': total,
-            'logo_detected': detected,
-            'logo_not_detected': total - detected,
-            'detection_rate': (detected / total * 100) if total > 0 else 0,
-            'streamers_stats': dict(streamers_stats)
+    Los timestamps se guardan con isoformat(), así que basta con recortar el
+    texto; solo si no tiene la forma esperada se parsea completo.
+    """
+    text = timestamp[:19]
+    if (len(text) == 19
+            and text[4] + text[7] + text[10] + text[13] + text[16] == '--T::'
+            and (text[:4] + text[5:7] + text[8:10] + text[11:13] + text[14:16] + text[17:]).isdigit()):
+        return text.replace('T', ' ')
+    return datetime.fromisoformat(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+
+# Recursos estáticos del dashboard. Se escriben una sola vez en
+# <directorio del dashboard>/static y la página los referencia, así el HTML
+# solo lleva los datos y el navegador cachea los estilos entre recargas.
+DASHBOARD_CSS = """* {
+    margin: 0;
+    padding: 0;
+    box-sizing: border-box;
+}
+
+body {
+    font-family: 'Inter', 'Segoe UI', system-ui, -apple-system, sans-serif;
+    background: #0a0a0a;
+    padding: 0;
+    color: #e5e5e5;
+    min-height: 100vh;
+}
+
+.header {
+    background: linear-gradient(135deg, #1a1a1a 0%, #0f0f0f 100%);
+    padding: 40px 20px;
+    border-bottom: 3px solid #f21717;
+    box-shadow: 0 4px 20px rgba(242, 23, 23, 0.3);
+}
+
+.header-content {
+    max-width: 1400px;
+    margin: 0 auto;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    gap: 30px;
+}
+
+.logo-main {
+    height: 80px;
+    width: auto;
+    filter: drop-shadow(0 0 20px rgba(242, 23, 23, 0.6));
+    animation: pulse 3s ease-in-out infinite;
+}
+
+@keyframes pulse {
+    0%, 100% { filter: drop-shadow(0 0 20px rgba(242, 23, 23, 0.6)); }
+    50% { filter: drop-shadow(0 0 30px rgba(242, 23, 23, 0.9)); }
+}
+
+.header-text {
+    text-align: left;
+}
+
+.header-text h1 {
+    color: #ffffff;
+    font-size: 2.2em;
+    font-weight: 700;
+    letter-spacing: -0.5px;
+    margin-bottom: 5px;
+    text-transform: none;
+}
+
+.header-text .subtitle {
+    color: #999;
+    font-size: 0.95em;
+    font-weight: 400;
+    margin: 0;
+    text-align: left;
+}
+
+.container {
+    max-width: 1400px;
+    margin: 0 auto;
+    background: transparent;
+    padding: 40px 20px;
+}
+
+h1 {
+    color: #f21717;
+    text-align: center;
+    margin-bottom: 10px;
+    font-size: 2.5em;
+    text-transform: uppercase;
+    letter-spacing: 2px;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    gap: 20px;
+}
+
+.logo-header {
+    height: 60px;
+    width: auto;
+    filter: drop-shadow(0 0 10px rgba(242,23,23,0.5));
+}
+
+.subtitle {
+    text-align: center;
+    color: #dbbfaf;
+    margin-bottom: 30px;
+    font-size: 1.1em;
+}
+
+.stats-grid {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
+    gap: 25px;
+    margin-bottom: 50px;
+}
+
+.stat-card {
+    background: linear-gradient(135deg, #1a1a1a 0%, #151515 100%);
+    color: #e5e5e5;
+    padding: 30px;
+    border-radius: 12px;
+    text-align: center;
+    box-shadow: 0 4px 15px rgba(0, 0, 0, 0.4);
+    border: 1px solid #2a2a2a;
+    transition: all 0.3s ease;
+    position: relative;
+    overflow: hidden;
+}
+
+.stat-card::before {
+    content: '';
+    position: absolute;
+    top: 0;
+    left: 0;
+    right: 0;
+    height: 3px;
+    background: linear-gradient(90deg, #f21717 0%, #ff3333 100%);
+}
+
+.stat-card:hover {
+    transform: translateY(-5px);
+    box-shadow: 0 8px 25px rgba(242, 23, 23, 0.3);
+    border-color: #f21717;
+}
+
+.stat-card h3 {
+    font-size: 0.85em;
+    text-transform: uppercase;
+    letter-spacing: 1.5px;
+    margin-bottom: 15px;
+    opacity: 0.7;
+    font-weight: 600;
+}
+
+.stat-card .value {
+    font-size: 3em;
+    font-weight: 700;
+    line-height: 1;
+    color: #ffffff;
+}
+
+.stat-card.success::before {
+    background: linear-gradient(90deg, #10b981 0%, #34d399 100%);
+}
+
+.stat-card.success .value {
+    color: #10b981;
+}
+
+.stat-card.danger::before {
+    background: linear-gradient(90deg, #ef4444 0%, #f87171 100%);
+}
+
+.stat-card.danger .value {
+    color: #ef4444;
+}
+
+.section-title {
+    color: #ffffff;
+    font-size: 1.5em;
+    margin: 50px 0 25px 0;
+    padding-bottom: 15px;
+    border-bottom: 2px solid #2a2a2a;
+    font-weight: 600;
+    letter-spacing: -0.5px;
+    display: flex;
+    align-items: center;
+    gap: 10px;
+}
+
+.section-title::before {
+    content: '';
+    width: 4px;
+    height: 24px;
+    background: linear-gradient(180deg, #f21717 0%, #ff3333 100%);
+    border-radius: 2px;
+}
+
+table {
+    width: 100%;
+    border-collapse: collapse;
+    margin-bottom: 30px;
+    background: #1a1a1a;
+    border-radius: 12px;
+    overflow: hidden;
+    box-shadow: 0 4px 15px rgba(0, 0, 0, 0.3);
+}
+
+th {
+    background: #0f0f0f;
+    color: #ffffff;
+    padding: 18px 20px;
+    text-align: left;
+    font-weight: 600;
+    font-size: 0.9em;
+    letter-spacing: 0.5px;
+    border-bottom: 2px solid #f21717;
+}
+
+td {
+    padding: 16px 20px;
+    border-bottom: 1px solid #252525;
+    color: #e5e5e5;
+    font-size: 0.95em;
+}
+
+tr:last-child td {
+    border-bottom: none;
+}
+
+tr:hover {
+    background-color: #202020;
+}
+
+.thumbnail {
+    width: 180px;
+    height: auto;
+    border-radius: 8px;
+    cursor: pointer;
+    transition: all 0.3s ease;
+    box-shadow: 0 2px 12px rgba(0, 0, 0, 0.4);
+    border: 2px solid transparent;
+}
+
+.thumbnail:hover {
+    transform: scale(1.05);
+    box-shadow: 0 4px 20px rgba(242, 23, 23, 0.5);
+    border-color: #f21717;
+}
+
+.detected {
+    background-color: rgba(16, 185, 129, 0.05);
+}
+
+.not-detected {
+    background-color: rgba(239, 68, 68, 0.05);
+}
+
+.status-detected {
+    color: #10b981;
+    font-size: 1.8em;
+    font-weight: bold;
+}
+
+.status-not-detected {
+    color: #ef4444;
+    font-size: 1.8em;
+    font-weight: bold;
+}
+
+.footer {
+    text-align: center;
+    color: #666;
+    margin-top: 60px;
+    padding: 30px 20px;
+    border-top: 1px solid #2a2a2a;
+    font-size: 0.9em;
+}
+
+.footer p {
+    margin: 5px 0;
+}
+
+.no-data {
+    text-align: center;
+    padding: 80px 40px;
+    color: #666;
+    font-size: 1.1em;
+}
+
+@media (max-width: 768px) {
+    .stats-grid {
+        grid-template-columns: 1fr;
+    }
+
+    table {
+        font-size: 0.85em;
+    }
+
+    .thumbnail {
+        width: 100px;
+    }
+}
+"""
+
+LOGO_SVG = """<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 1627.51 384.83">
+    <defs>
+        <style>.cls-1{fill:#f21717;}</style>
+    </defs>
+    <g>
+        <g>
+            <path class="cls-1" d="M1321.24,1.47l-45.81,88.33C1263.26,53.84,1218.45.39,1146.48.39H481.96c-37.42,98.78-95.3,135.83-163.49,141.78L391.45,0h-218.38L0,331.44c204.51-101.56,402.58-144.77,620.33-185.82,72.69-15.04,126.86-45.41,159.72-93.39h30.68c-16.35,42.32-3.55,69.04,65.78,65.54,211.03-11.54,407.62.37,594.35,28.29L1546.12,1.47h-224.88Z"/>
+            <path class="cls-1" d="M664.19,331.92h-37.32c46.68-159.09-244.67-85.31-406.22,43.85,117.14-50.87,212.17-58.43,177.13,8.52h455.12l18.78-37.1c-22.26-13.79-20.77-34.88-4.18-60.61h248.38c28.59-.57,48.03-.57,62.6-9.89l-56.09,108.14h224.62l107.99-208.2c-390.44-43.87-674.24-7.34-790.81,155.28Z"/>
+        </g>
+        <path class="cls-1" d="M1598.26,58.87c-5.34,0-10.24-1.2-14.68-3.61-4.44-2.41-7.98-5.81-10.61-10.22-2.64-4.4-3.95-9.54-3.95-15.41s1.32-10.99,3.95-15.36c2.63-4.36,6.17-7.77,10.61-10.22,4.44-2.45,9.33-3.67,14.68-3.67s10.33,1.22,14.73,3.67c4.4,2.45,7.92,5.85,10.56,10.22,2.63,4.37,3.95,9.48,3.95,15.36s-1.32,11.01-3.95,15.41c-2.64,4.4-6.15,7.81-10.56,10.22-4.4,2.41-9.31,3.61-14.73,3.61ZM1598.26,52.55c4.29,0,8.15-.94,11.57-2.82,3.42-1.88,6.15-4.55,8.19-8.02,2.03-3.46,3.05-7.49,3.05-12.08s-1.02-8.71-3.05-12.14c-2.03-3.42-4.76-6.08-8.19-7.96-3.43-1.88-7.28-2.82-11.57-2.82s-8.05.94-11.52,2.82c-3.46,1.88-6.21,4.54-8.24,7.96-2.03,3.43-3.05,7.47-3.05,12.14s1.02,8.62,3.05,12.08c2.03,3.46,4.78,6.14,8.24,8.02,3.46,1.88,7.3,2.82,11.52,2.82ZM1588.89,45.77V13.37h10.84c3.91,0,6.74.85,8.47,2.54,1.73,1.69,2.6,3.97,2.6,6.83,0,2.33-.55,4.23-1.64,5.7-1.09,1.47-2.62,2.54-4.57,3.22l7.23,14.11h-6.66l-6.44-13.44h-3.73v13.44h-6.1ZM1595.1,26.92h3.95c1.5,0,2.82-.26,3.95-.79,1.13-.53,1.69-1.66,1.69-3.39s-.56-2.73-1.69-3.22c-1.13-.49-2.45-.73-3.95-.73h-3.95v8.13Z"/>
+    </g>
+</svg>
+"""
+
+# Arma la tabla del historial en el navegador a partir de los datos embebidos
+# en la página. Usa textContent, así que el texto de Twitch nunca se
+# interpreta como HTML.
+DASHBOARD_JS = """(function () {
+    var data = document.getElementById('detections-data');
+    var body = document.getElementById('detections-body');
+    if (!data || !body) {
+        return;
+    }
+
+    function cell(row, text, className) {
+        var td = document.createElement('td');
+        if (className) {
+            td.className = className;
         }
-    
-    def generate_dashboard(self, output_path='reports/dashboard.html'):
-        """
-        Genera el dashboard HTML.
-        
-        Args:
-            output_path: Ruta donde guardar el dashboard
-        """
-        output_file = Path(output_path)
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        stats = self._calculate_statistics()
-        
-        # Ordenar detecciones por fecha (más recientes primero)
-        sorted_detections = sorted(
-            self.detections, 
-            key=lambda x: x['timestamp'], 
-            reverse=True
-        )
-        
-        html_content = self._generate_html(stats, sorted_detections)
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        
-        print(f"✓ Dashboard generado: {output_file.absolute()}")
-        return str(output_file.absolute())
-    
-    def _generate_html(self, stats, detections):
-        """Genera el contenido HTML del dashboard."""
-        
-        # Generar filas de la tabla de detecciones
-        detection_rows = ""
-        for detection in detections:
-            timestamp = datetime.fromisoformat(detection['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
-            status_icon = "✓" if detection['logo_detected'] else "✗"
-            status_class = "detected" if detection['logo_detected'] else "not-detected"
-            confidence_pct = f"{detection['confidence']:.1%}"
-            
-            detection_rows += f"""
-                <tr class="{status_class}">
-                    <td>{timestamp}</td>
-                    <td><strong>{detection['streamer']}</strong></td>
-                    <td>{detection['title']}</td>
-                    <td>{detection['game']}</td>
-                    <td>{detection['viewers']}</td>
-                    <td class="status-{status_class}">{status_icon}</td>
-                    <td>{confidence_pct}</td>
-                    <td>
-                        <a href="screenshots/{detection['annotated']}" target="_blank">
-                            <img src="screenshots/{detection['annotated']}" alt="Screenshot" class="thumbnail">
-                        </a>
-                    </td>
-                </tr>
-            """
-        
-        # Generar filas de estadísticas por streamer
-        streamer_stats_rows = ""
-        for streamer, stat in stats['streamers_stats'].items():
-            streamer_stats_rows += f"""
-                <tr>
-                    <td><strong>{streamer}</strong></td>
-                    <td>{stat['total']}</td>
-                    <td class="detected">{stat['detected']}</td>
-                    <td class="not-detected">{stat['not_detected']}</td>
-                    <td><strong>{stat['rate']:.1f}%</strong></td>
-                </tr>
-            """
-        
-        html = f"""
-<!DOCTYPE html>
+        td.textContent = text;
+        row.appendChild(td);
+        return td;
+    }
+
+    function strong(row, text) {
+        var td = cell(row, '');
+        var b = document.createElement('strong');
+        b.textContent = text;
+        td.appendChild(b);
+    }
+
+    // Cada fila: [fecha, streamer, título, juego, espectadores, detectado, confianza, captura, miniatura]
+    var fragment = document.createDocumentFragment();
+    JSON.parse(data.textContent).forEach(function (d) {
+        var status = d[5] ? 'detected' : 'not-detected';
+        var tr = document.createElement('tr');
+        tr.className = status;
+        cell(tr, d[0]);
+        strong(tr, d[1]);
+        cell(tr, d[2]);
+        cell(tr, d[3]);
+        cell(tr, d[4]);
+        cell(tr, d[5] ? '\u2713' : '\u2717', 'status-' + status);
+        cell(tr, d[6] + '%');
+
+        var link = document.createElement('a');
+        link.href = 'screenshots/' + d[7];
+        link.target = '_blank';
+        var img = document.createElement('img');
+        img.src = 'screenshots/' + d[8];
+        img.alt = 'Screenshot';
+        img.className = 'thumbnail';
+        img.loading = 'lazy';
+        link.appendChild(img);
+        cell(tr, '').appendChild(link);
+
+        fragment.appendChild(tr);
+    });
+    body.appendChild(fragment);
+})();
+"""
+
+STATIC_ASSETS = {
+    'dashboard.css': DASHBOARD_CSS,
+    'dashboard.js': DASHBOARD_JS,
+    'logo.svg': LOGO_SVG
+}
+
+# Cabecera estática de la página; los estilos y el logo se sirven aparte
+PAGE_HEAD = """<!DOCTYPE html>
 <html lang="es">
 <head>
     <meta charset="UTF-8">
@@ -147,314 +425,12 @@ class ReportGenerator:
     <link rel="preconnect" href="https://fonts.googleapis.com">
     <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
     <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap" rel="stylesheet">
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: 'Inter', 'Segoe UI', system-ui, -apple-system, sans-serif;
-            background: #0a0a0a;
-            padding: 0;
-            color: #e5e5e5;
-            min-height: 100vh;
-        }}
-        
-        .header {{
-            background: linear-gradient(135deg, #1a1a1a 0%, #0f0f0f 100%);
-            padding: 40px 20px;
-            border-bottom: 3px solid #f21717;
-            box-shadow: 0 4px 20px rgba(242, 23, 23, 0.3);
-        }}
-        
-        .header-content {{
-            max-width: 1400px;
-            margin: 0 auto;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            gap: 30px;
-        }}
-        
-        .logo-main {{
-            height: 80px;
-            width: auto;
-            filter: drop-shadow(0 0 20px rgba(242, 23, 23, 0.6));
-            animation: pulse 3s ease-in-out infinite;
-        }}
-        
-        @keyframes pulse {{
-            0%, 100% {{ filter: drop-shadow(0 0 20px rgba(242, 23, 23, 0.6)); }}
-            50% {{ filter: drop-shadow(0 0 30px rgba(242, 23, 23, 0.9)); }}
-        }}
-        
-        .header-text {{
-            text-align: left;
-        }}
-        
-        .header-text h1 {{
-            color: #ffffff;
-            font-size: 2.2em;
-            font-weight: 700;
-            letter-spacing: -0.5px;
-            margin-bottom: 5px;
-            text-transform: none;
-        }}
-        
-        .header-text .subtitle {{
-            color: #999;
-            font-size: 0.95em;
-            font-weight: 400;
-            margin: 0;
-            text-align: left;
-        }}
-        
-        .container {{
-            max-width: 1400px;
-            margin: 0 auto;
-            background: transparent;
-            padding: 40px 20px;
-        }}
-        
-        h1 {{
-            color: #f21717;
-            text-align: center;
-            margin-bottom: 10px;
-            font-size: 2.5em;
-            text-transform: uppercase;
-            letter-spacing: 2px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            gap: 20px;
-        }}
-        
-        .logo-header {{
-            height: 60px;
-            width: auto;
-            filter: drop-shadow(0 0 10px rgba(242,23,23,0.5));
-        }}
-        
-        .subtitle {{
-            text-align: center;
-            color: #dbbfaf;
-            margin-bottom: 30px;
-            font-size: 1.1em;
-        }}
-        
-        .stats-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-            gap: 25px;
-            margin-bottom: 50px;
-        }}
-        
-        .stat-card {{
-            background: linear-gradient(135deg, #1a1a1a 0%, #151515 100%);
-            color: #e5e5e5;
-            padding: 30px;
-            border-radius: 12px;
-            text-align: center;
-            box-shadow: 0 4px 15px rgba(0, 0, 0, 0.4);
-            border: 1px solid #2a2a2a;
-            transition: all 0.3s ease;
-            position: relative;
-            overflow: hidden;
-        }}
-        
-        .stat-card::before {{
-            content: '';
-            position: absolute;
-            top: 0;
-            left: 0;
-            right: 0;
-            height: 3px;
-            background: linear-gradient(90deg, #f21717 0%, #ff3333 100%);
-        }}
-        
-        .stat-card:hover {{
-            transform: translateY(-5px);
-            box-shadow: 0 8px 25px rgba(242, 23, 23, 0.3);
-            border-color: #f21717;
-        }}
-        
-        .stat-card h3 {{
-            font-size: 0.85em;
-            text-transform: uppercase;
-            letter-spacing: 1.5px;
-            margin-bottom: 15px;
-            opacity: 0.7;
-            font-weight: 600;
-        }}
-        
-        .stat-card .value {{
-            font-size: 3em;
-            font-weight: 700;
-            line-height: 1;
-            color: #ffffff;
-        }}
-        
-        .stat-card.success::before {{
-            background: linear-gradient(90deg, #10b981 0%, #34d399 100%);
-        }}
-        
-        .stat-card.success .value {{
-            color: #10b981;
-        }}
-        
-        .stat-card.danger::before {{
-            background: linear-gradient(90deg, #ef4444 0%, #f87171 100%);
-        }}
-        
-        .stat-card.danger .value {{
-            color: #ef4444;
-        }}
-        
-        .section-title {{
-            color: #ffffff;
-            font-size: 1.5em;
-            margin: 50px 0 25px 0;
-            padding-bottom: 15px;
-            border-bottom: 2px solid #2a2a2a;
-            font-weight: 600;
-            letter-spacing: -0.5px;
-            display: flex;
-            align-items: center;
-            gap: 10px;
-        }}
-        
-        .section-title::before {{
-            content: '';
-            width: 4px;
-            height: 24px;
-            background: linear-gradient(180deg, #f21717 0%, #ff3333 100%);
-            border-radius: 2px;
-        }}
-        
-        table {{
-            width: 100%;
-            border-collapse: collapse;
-            margin-bottom: 30px;
-            background: #1a1a1a;
-            border-radius: 12px;
-            overflow: hidden;
-            box-shadow: 0 4px 15px rgba(0, 0, 0, 0.3);
-        }}
-        
-        th {{
-            background: #0f0f0f;
-            color: #ffffff;
-            padding: 18px 20px;
-            text-align: left;
-            font-weight: 600;
-            font-size: 0.9em;
-            letter-spacing: 0.5px;
-            border-bottom: 2px solid #f21717;
-        }}
-        
-        td {{
-            padding: 16px 20px;
-            border-bottom: 1px solid #252525;
-            color: #e5e5e5;
-            font-size: 0.95em;
-        }}
-        
-        tr:last-child td {{
-            border-bottom: none;
-        }}
-        
-        tr:hover {{
-            background-color: #202020;
-        }}
-        
-        .thumbnail {{
-            width: 180px;
-            height: auto;
-            border-radius: 8px;
-            cursor: pointer;
-            transition: all 0.3s ease;
-            box-shadow: 0 2px 12px rgba(0, 0, 0, 0.4);
-            border: 2px solid transparent;
-        }}
-        
-        .thumbnail:hover {{
-            transform: scale(1.05);
-            box-shadow: 0 4px 20px rgba(242, 23, 23, 0.5);
-            border-color: #f21717;
-        }}
-        
-        .detected {{
-            background-color: rgba(16, 185, 129, 0.05);
-        }}
-        
-        .not-detected {{
-            background-color: rgba(239, 68, 68, 0.05);
-        }}
-        
-        .status-detected {{
-            color: #10b981;
-            font-size: 1.8em;
-            font-weight: bold;
-        }}
-        
-        .status-not-detected {{
-            color: #ef4444;
-            font-size: 1.8em;
-            font-weight: bold;
-        }}
-        
-        .footer {{
-            text-align: center;
-            color: #666;
-            margin-top: 60px;
-            padding: 30px 20px;
-            border-top: 1px solid #2a2a2a;
-            font-size: 0.9em;
-        }}
-        
-        .footer p {{
-            margin: 5px 0;
-        }}
-        
-        .no-data {{
-            text-align: center;
-            padding: 80px 40px;
-            color: #666;
-            font-size: 1.1em;
-        }}
-        
-        @media (max-width: 768px) {{
-            .stats-grid {{
-                grid-template-columns: 1fr;
-            }}
-            
-            table {{
-                font-size: 0.85em;
-            }}
-            
-            .thumbnail {{
-                width: 100px;
-            }}
-        }}
-    </style>
+    <link rel="stylesheet" href="static/dashboard.css">
 </head>
 <body>
     <div class="header">
         <div class="header-content">
-            <svg class="logo-main" xmlns="http://www.w3.org/2000/svg" viewBox="0 0 1627.51 384.83">
-                <defs>
-                    <style>.cls-1{{fill:#f21717;}}</style>
-                </defs>
-                <g>
-                    <g>
-                        <path class="cls-1" d="M1321.24,1.47l-45.81,88.33C1263.26,53.84,1218.45.39,1146.48.39H481.96c-37.42,98.78-95.3,135.83-163.49,141.78L391.45,0h-218.38L0,331.44c204.51-101.56,402.58-144.77,620.33-185.82,72.69-15.04,126.86-45.41,159.72-93.39h30.68c-16.35,42.32-3.55,69.04,65.78,65.54,211.03-11.54,407.62.37,594.35,28.29L1546.12,1.47h-224.88Z"/>
-                        <path class="cls-1" d="M664.19,331.92h-37.32c46.68-159.09-244.67-85.31-406.22,43.85,117.14-50.87,212.17-58.43,177.13,8.52h455.12l18.78-37.1c-22.26-13.79-20.77-34.88-4.18-60.61h248.38c28.59-.57,48.03-.57,62.6-9.89l-56.09,108.14h224.62l107.99-208.2c-390.44-43.87-674.24-7.34-790.81,155.28Z"/>
-                    </g>
-                    <path class="cls-1" d="M1598.26,58.87c-5.34,0-10.24-1.2-14.68-3.61-4.44-2.41-7.98-5.81-10.61-10.22-2.64-4.4-3.95-9.54-3.95-15.41s1.32-10.99,3.95-15.36c2.63-4.36,6.17-7.77,10.61-10.22,4.44-2.45,9.33-3.67,14.68-3.67s10.33,1.22,14.73,3.67c4.4,2.45,7.92,5.85,10.56,10.22,2.63,4.37,3.95,9.48,3.95,15.36s-1.32,11.01-3.95,15.41c-2.64,4.4-6.15,7.81-10.56,10.22-4.4,2.41-9.31,3.61-14.73,3.61ZM1598.26,52.55c4.29,0,8.15-.94,11.57-2.82,3.42-1.88,6.15-4.55,8.19-8.02,2.03-3.46,3.05-7.49,3.05-12.08s-1.02-8.71-3.05-12.14c-2.03-3.42-4.76-6.08-8.19-7.96-3.43-1.88-7.28-2.82-11.57-2.82s-8.05.94-11.52,2.82c-3.46,1.88-6.21,4.54-8.24,7.96-2.03,3.43-3.05,7.47-3.05,12.14s1.02,8.62,3.05,12.08c2.03,3.46,4.78,6.14,8.24,8.02,3.46,1.88,7.3,2.82,11.52,2.82ZM1588.89,45.77V13.37h10.84c3.91,0,6.74.85,8.47,2.54,1.73,1.69,2.6,3.97,2.6,6.83,0,2.33-.55,4.23-1.64,5.7-1.09,1.47-2.62,2.54-4.57,3.22l7.23,14.11h-6.66l-6.44-13.44h-3.73v13.44h-6.1ZM1595.1,26.92h3.95c1.5,0,2.82-.26,3.95-.79,1.13-.53,1.69-1.66,1.69-3.39s-.56-2.73-1.69-3.22c-1.13-.49-2.45-.73-3.95-.73h-3.95v8.13Z"/>
-                </g>
-            </svg>
+            <img class="logo-main" src="static/logo.svg" alt="KPI">
             <div class="header-text">
                 <h1>Stream Monitor Dashboard</h1>
                 <p class="subtitle">Monitoreo en tiempo real de logo en streams de Twitch</p>
@@ -464,38 +440,446 @@ class ReportGenerator:
     
     <div class="container">
         
-        <div class="stats-grid">
+"""
+
+# Plantilla del dashboard. Se compila una sola vez al importar el módulo; el
+# autoescape protege el texto que viene de Twitch (títulos, juegos, nombres).
+_TEMPLATE_SRC = PAGE_HEAD + """        <div class="stats-grid">
             <div class="stat-card">
                 <h3>Total de Chequeos</h3>
-                <div class="value">{stats['total_checks']}</div>
+                <div class="value">{{ stats.total_checks }}</div>
             </div>
             <div class="stat-card success">
                 <h3>Logo Detectado</h3>
-                <div class="value">{stats['logo_detected']}</div>
+                <div class="value">{{ stats.logo_detected }}</div>
             </div>
             <div class="stat-card danger">
                 <h3>Logo NO Detectado</h3>
-                <div class="value">{stats['logo_not_detected']}</div>
+                <div class="value">{{ stats.logo_not_detected }}</div>
             </div>
             <div class="stat-card">
                 <h3>Tasa de Detección</h3>
-                <div class="value">{stats['detection_rate']:.1f}%</div>
+                <div class="value">{{ '%.1f'|format(stats.detection_rate) }}%</div>
             </div>
         </div>
         
         <h2 class="section-title">📊 Estadísticas por Streamer</h2>
-        {"<table><thead><tr><th>Streamer</th><th>Total Chequeos</th><th>Detectado</th><th>No Detectado</th><th>Tasa</th></tr></thead><tbody>" + streamer_stats_rows + "</tbody></table>" if streamer_stats_rows else "<p class='no-data'>No hay datos disponibles aún</p>"}
+        {% if stats.streamers_stats %}
+        <table><thead><tr><th>Streamer</th><th>Total Chequeos</th><th>Detectado</th><th>No Detectado</th><th>Tasa</th></tr></thead><tbody>
+            {% for streamer, stat in stats.streamers_stats.items() %}
+                <tr>
+                    <td><strong>{{ streamer }}</strong></td>
+                    <td>{{ stat.total }}</td>
+                    <td class="detected">{{ stat.detected }}</td>
+                    <td class="not-detected">{{ stat.not_detected }}</td>
+                    <td><strong>{{ '%.1f'|format(stat.detected / stat.total * 100) }}%</strong></td>
+                </tr>
+            {% endfor %}
+        </tbody></table>
+        {% else %}
+        <p class='no-data'>No hay datos disponibles aún</p>
+        {% endif %}
         
         <h2 class="section-title">🔍 Historial de Detecciones</h2>
-        {"<table><thead><tr><th>Fecha/Hora</th><th>Streamer</th><th>Título</th><th>Juego</th><th>Espectadores</th><th>Estado</th><th>Confianza</th><th>Captura</th></tr></thead><tbody>" + detection_rows + "</tbody></table>" if detection_rows else "<p class='no-data'>No hay detecciones registradas aún. El bot agregará datos aquí cuando detecte streams en vivo.</p>"}
+        {% if detections %}
+        <table><thead><tr><th>Fecha/Hora</th><th>Streamer</th><th>Título</th><th>Juego</th><th>Espectadores</th><th>Estado</th><th>Confianza</th><th>Captura</th></tr></thead><tbody id="detections-body"></tbody></table>
+        <noscript><p class='no-data'>Activa JavaScript para ver el historial de detecciones.</p></noscript>
+        <script type="application/json" id="detections-data">{{ detections|detections_json }}</script>
+        <script src="static/dashboard.js"></script>
+        {% else %}
+        <p class='no-data'>No hay detecciones registradas aún. El bot agregará datos aquí cuando detecte streams en vivo.</p>
+        {% endif %}
         
         <div class="footer">
-            <p>Última actualización: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+            <p>Última actualización: {{ now.strftime('%Y-%m-%d %H:%M:%S') }}</p>
             <p>Bot de Monitoreo de Logo KPI - Presiona F5 para actualizar</p>
         </div>
     </div>
 </body>
 </html>
+"""
+
+# Versión de la plantilla y de los archivos estáticos, incluida en el sello
+# del dashboard para que un cambio en cualquiera de ellos lo regenere aunque
+# no haya detecciones nuevas
+_DASHBOARD_VERSION = hashlib.sha1(
+    ''.join([_TEMPLATE_SRC, *STATIC_ASSETS.values()]).encode('utf-8')).hexdigest()[:12]
+
+
+# Caracteres que se escapan en el JSON embebido para que no pueda cerrar la
+# etiqueta <script> ni formar entidades HTML; se reemplazan en una sola pasada
+_JSON_SCRIPT_ESCAPES = str.maketrans({'<': '\\u003c', '>': '\\u003e', '&': '\\u0026'})
+
+
+def _detections_json(detections):
+    """
+    Serializa las filas del historial como JSON para embeberlas en la página.
+    
+    Cada detección se reduce a una lista con los valores ya formateados, en el
+    orden de las columnas de la tabla, más la miniatura (las detecciones
+    anteriores a las miniaturas WebP usan la imagen anotada). Se escapan '<',
+    '>' y '&' para que el texto no pueda cerrar la etiqueta <script> que lo
+    contiene.
+    
+    Args:
+        detections: Detecciones a mostrar, más recientes primero
+        
+    Returns:
+        Markup con el JSON, listo para insertar sin volver a escapar
+    """
+    rows = [
+        [_format_timestamp(d['timestamp']), d['streamer'], d['title'], d['game'],
+         d['viewers'], d['logo_detected'], '%.1f' % (d['confidence'] * 100), d['annotated'],
+         d.get('preview', d['annotated'])]
+        for d in detections
+    ]
+    payload = fast_json.dumps(rows).decode('utf-8')
+    return Markup(payload.translate(_JSON_SCRIPT_ESCAPES))
+
+
+
+def _bytecode_cache():
+    """
+    Caché en disco de la plantilla compilada, para que un reinicio del bot no
+    vuelva a compilarla. Si no se puede escribir en el directorio se compila
+    siempre.
+    """
+    try:
+        ensure_dir(JINJA_CACHE_DIR)
+    except OSError:
+        return None
+    if not os.access(JINJA_CACHE_DIR, os.W_OK):
+        return None
+    return FileSystemBytecodeCache(str(JINJA_CACHE_DIR), '%s.cache')
+
+
+# La plantilla nunca cambia mientras el proceso corre, así que no hace falta
+# que Jinja compruebe si se modificó (auto_reload)
+_ENV = Environment(loader=DictLoader({'dashboard.html': _TEMPLATE_SRC}),
+                   autoescape=True, trim_blocks=True, lstrip_blocks=True,
+                   auto_reload=False, bytecode_cache=_bytecode_cache())
+_ENV.filters['detections_json'] = _detections_json
+_TEMPLATE = _ENV.get_template('dashboard.html')
+
+
+class ReportGenerator:
+    """Genera reportes HTML del monitoreo de logos."""
+    
+    def __init__(self, detections_file='data/detections.jsonl'):
+        """
+        Inicializa el generador de reportes.
+        
+        Args:
+            detections_file: Ruta al archivo JSON Lines con detecciones
+        """
+        self.detections_file = Path(detections_file)
+        # Snapshot de los contadores ya calculados, junto al historial
+        self.stats_file = self.detections_file.with_name('stats.json')
+        # Contadores de las detecciones ya archivadas por la limpieza
+        self.cumulative_stats_file = self.detections_file.with_name('stats_cumulative.json')
+        # Posición (en bytes) hasta donde leyó la última llamada a _iter_detections()
+        self._read_offset = 0
+    
+    def _iter_detections(self, recent=None, start=0):
+        """
+        Recorre las detecciones del archivo JSON Lines una a una, sin cargar el
+        historial completo en memoria.
+        
+        El archivo está ordenado cronológicamente: StreamMonitor solo agrega
+        detecciones nuevas al final, con la hora del chequeo.
+        
+        Args:
+            recent: deque opcional (con maxlen) donde se guardan las detecciones
+                leídas, para quedarse con las más recientes en la misma pasada
+            start: Posición en bytes desde donde empezar a leer
+        """
+        self._read_offset = start
+        if not self.detections_file.exists():
+            return
+        
+        with open(self.detections_file, 'rb') as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Última línea a medio escribir: se leerá en la próxima pasada
+                    break
+                self._read_offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    detection = fast_json.loads(line)
+                except fast_json.JSONDecodeError:
+                    # Línea incompleta (p. ej. escritura interrumpida)
+                    continue
+                if recent is not None:
+                    recent.append(detection)
+                yield detection
+    
+    def _calculate_statistics(self, detections, counts=None):
+        """
+        Calcula estadísticas generales de las detecciones en una sola pasada.
+        
+        Args:
+            detections: Iterable de detecciones (se recorre una sola vez)
+            counts: Contadores de un snapshot previo a los que se suman las
+                detecciones ({'total', 'detected', 'streamers_stats'})
+        """
+        # Totales y conteos por streamer (la tasa se calcula al renderizar)
+        counts = counts or {}
+        total = counts.get('total', 0)
+        detected = counts.get('detected', 0)
+        streamers_stats = dict(counts.get('streamers_stats', {}))
+        
+        for detection in detections:
+            logo_detected = detection['logo_detected']
+            total += 1
+            detected += logo_detected
+            streamer_stats = streamers_stats.get(detection['streamer'])
+            if streamer_stats is None:
+                streamer_stats = streamers_stats[detection['streamer']] = {
+                    'total': 0, 'detected': 0, 'not_detected': 0}
+            streamer_stats['total'] += 1
+            streamer_stats['detected' if logo_detected else 'not_detected'] += 1
+        
+        if not total:
+            return {
+                'total_checks': 0,
+                'logo_detected': 0,
+                'logo_not_detected': 0,
+                'detection_rate': 0.0,
+                'streamers_stats': {}
+            }
+        
+        return {
+            'total_checks': total,
+            'logo_detected': detected,
+            'logo_not_detected': total - detected,
+            'detection_rate': detected / total * 100,
+            'streamers_stats': streamers_stats
+        }
+    
+    def generate_dashboard(self, output_path='reports/dashboard.html'):
+        """
+        Genera el dashboard HTML.
+        
+        Junto al dashboard se guarda un archivo de sello con la versión de la
+        plantilla y la fecha de modificación y el tamaño del archivo de
+        detecciones usado. Si no cambiaron desde la última vez, el dashboard
+        existente se reutiliza tal cual sin leer ni renderizar nada.
+        
+        Args:
+            output_path: Ruta donde guardar el dashboard
         """
+        output_file = Path(output_path)
+        absolute_path = str(output_file.absolute())
+        ensure_dir(output_file.parent)
+        
+        # El sello se toma antes de leer: si llegan detecciones mientras se
+        # genera el dashboard, la próxima vez no coincidirá y se regenerará
+        stamp_file = output_file.with_name(f'.{output_file.stem}.stamp')
+        stamp = self._detections_stamp()
+        if (output_file.exists() and stamp_file.exists()
+                and stamp_file.read_text(encoding='utf-8') == stamp):
+            return absolute_path
+        
+        self._ensure_static_assets(output_file.parent)
+        
+        # Una sola pasada por el archivo (o solo por lo agregado desde el último
+        # snapshot): se acumulan las estadísticas y se conservan solo las
+        # últimas MAX_DASHBOARD_ROWS detecciones para la tabla
+        snapshot = self._load_snapshot()
+        recent_detections = deque(snapshot['recent'], maxlen=MAX_DASHBOARD_ROWS)
+        stats = self._calculate_statistics(
+            self._iter_detections(recent_detections, start=snapshot['offset']), snapshot['stats'])
+        self._save_snapshot(stats, recent_detections)
+        
+        # Más recientes primero: las detecciones ya están en orden cronológico,
+        # así que basta con invertirlas. Solo si el archivo se editó a mano y
+        # quedó desordenado hace falta ordenar.
+        sorted_detections = list(reversed(recent_detections))
+        if not self._is_newest_first(sorted_detections):
+            sorted_detections.sort(key=itemgetter('timestamp'), reverse=True)
+        
+        # Se escribe en un archivo temporal y se reemplaza de una vez, para que
+        # el servidor web nunca entregue un dashboard escrito a medias
+        tmp_file = output_file.with_name(output_file.name + '.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            self._write_html(stats, sorted_detections, f)
+        
+        # Copia comprimida para que el servidor web la entregue con
+        # Content-Encoding: gzip sin comprimir en cada petición
+        gz_file = output_file.with_name(output_file.name + '.gz')
+        tmp_gz_file = gz_file.with_name(gz_file.name + '.tmp')
+        with open(tmp_file, 'rb') as src, gzip.open(tmp_gz_file, 'wb', compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp_gz_file, gz_file)
+        os.replace(tmp_file, output_file)
+        stamp_file.write_text(stamp, encoding='utf-8')
+        
+        print(f"✓ Dashboard generado: {absolute_path}")
+        return absolute_path
+    
+    @staticmethod
+    def _is_newest_first(detections):
+        """Indica si las detecciones están ordenadas de la más reciente a la más antigua."""
+        timestamps = [detection['timestamp'] for detection in detections]
+        return all(newer >= older for newer, older in zip(timestamps, timestamps[1:]))
+    
+    def _load_snapshot(self):
+        """
+        Carga el snapshot de estadísticas si sigue siendo válido para el archivo
+        de detecciones actual.
+        
+        El snapshot guarda los contadores, las últimas detecciones y la posición
+        del archivo hasta donde se leyó. Como las detecciones solo se agregan al
+        final, alcanza con leer desde esa posición. Si el archivo se achicó o
+        su comienzo cambió (fue reescrito), se descarta y se recalcula todo.
         
-        return html
+        Returns:
+            Diccionario con 'stats', 'recent' y 'offset' (si no hay snapshot
+            válido se parte de los contadores de las detecciones archivadas)
+        """
+        empty = {'stats': self._load_cumulative_counts(), 'recent': (), 'offset': 0}
+        try:
+            snapshot = fast_json.loads(self.stats_file.read_bytes())
+            size = self.detections_file.stat().st_size
+        except (FileNotFoundError, fast_json.JSONDecodeError):
+            return empty
+        
+        if snapshot.get('offset', size + 1) > size:
+            return empty
+        expected_head = snapshot.get('head', '')
+        with open(self.detections_file, 'rb') as f:
+            head = f.read(len(expected_head)).decode('latin-1')
+        if head != expected_head:
+            return empty
+        return snapshot
+    
+    def _save_snapshot(self, stats, recent_detections):
+        """
+        Guarda el snapshot de estadísticas tras leer el archivo de detecciones.
+        
+        Args:
+            stats: Estadísticas calculadas por _calculate_statistics()
+            recent_detections: Últimas detecciones leídas, en orden cronológico
+        """
+        try:
+            with open(self.detections_file, 'rb') as f:
+                head = f.read(min(self._read_offset, SNAPSHOT_HEAD_BYTES)).decode('latin-1')
+        except FileNotFoundError:
+            return
+        
+        snapshot = {
+            'stats': self._counts(stats),
+            'recent': list(recent_detections),
+            'offset': self._read_offset,
+            'head': head
+        }
+        self._write_json(self.stats_file, snapshot)
+    
+    def archive_statistics(self, detections):
+        """
+        Suma detecciones que se sacan del historial (al archivarlas) a los
+        contadores acumulados, para que las estadísticas del dashboard sigan
+        incluyéndolas.
+        
+        El acumulado guarda la fecha de la última detección sumada y se ignoran
+        las que no son posteriores, así reintentar una limpieza interrumpida no
+        cuenta dos veces las mismas detecciones.
+        
+        Args:
+            detections: Iterable de detecciones archivadas, en orden
+                cronológico (se recorre una sola vez)
+        """
+        counts = self._load_cumulative_counts()
+        if counts is None and self.cumulative_stats_file.exists():
+            # Acumulado dañado: se guarda aparte en vez de pisarlo, para poder
+            # recuperar los totales históricos a mano
+            corrupt_file = self.cumulative_stats_file.with_name(
+                self.cumulative_stats_file.name + '.corrupt')
+            os.replace(self.cumulative_stats_file, corrupt_file)
+            print(f"⚠ Contadores acumulados dañados, se movieron a {corrupt_file}")
+        
+        archived_until = counts.get('archived_until') if counts else None
+        last_timestamp = archived_until
+        
+        def new_detections():
+            nonlocal last_timestamp
+            for detection in detections:
+                if (archived_until is None or datetime.fromisoformat(detection['timestamp'])
+                        > datetime.fromisoformat(archived_until)):
+                    last_timestamp = detection['timestamp']
+                    yield detection
+        
+        stats = self._calculate_statistics(new_detections(), counts)
+        cumulative = self._counts(stats)
+        cumulative['archived_until'] = last_timestamp
+        self._write_json(self.cumulative_stats_file, cumulative)
+    
+    def _load_cumulative_counts(self):
+        """Contadores de las detecciones archivadas, o None si todavía no hay."""
+        try:
+            return fast_json.loads(self.cumulative_stats_file.read_bytes())
+        except FileNotFoundError:
+            return None
+        except fast_json.JSONDecodeError as e:
+            print(f"⚠ No se pudo leer {self.cumulative_stats_file}: {e}")
+            return None
+    
+    @staticmethod
+    def _counts(stats):
+        """Contadores crudos ({'total', 'detected', 'streamers_stats'}) de unas estadísticas."""
+        return {
+            'total': stats['total_checks'],
+            'detected': stats['logo_detected'],
+            'streamers_stats': stats['streamers_stats']
+        }
+    
+    @staticmethod
+    def _write_json(path, obj):
+        """Guarda un objeto como JSON reemplazando el archivo de una sola vez."""
+        tmp_file = path.with_name(path.name + '.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(fast_json.dumps(obj))
+        os.replace(tmp_file, path)
+    
+    def _detections_stamp(self):
+        """
+        Sello '(versión) (mtime_ns) (tamaño)' del archivo de detecciones, con '-'
+        en lugar de la fecha y el tamaño si no existe.
+        """
+        try:
+            st = self.detections_file.stat()
+        except FileNotFoundError:
+            return f'{_DASHBOARD_VERSION} -'
+        return f'{_DASHBOARD_VERSION} {st.st_mtime_ns} {st.st_size}'
+    
+    def _ensure_static_assets(self, out_dir):
+        """
+        Escribe la hoja de estilos, el script y el logo del dashboard si todavía
+        no existen o si cambiaron respecto de los de esta versión.
+        
+        Args:
+            out_dir: Directorio donde se guarda el dashboard
+        """
+        static_dir = out_dir / 'static'
+        ensure_dir(static_dir)
+        for name, content in STATIC_ASSETS.items():
+            asset_path = static_dir / name
+            if not asset_path.exists() or asset_path.read_text(encoding='utf-8') != content:
+                asset_path.write_text(content, encoding='utf-8')
+    
+    def _write_html(self, stats, detections, fh):
+        """
+        Escribe el contenido HTML del dashboard en un archivo abierto.
+        
+        Args:
+            stats: Estadísticas calculadas por _calculate_statistics()
+            detections: Detecciones a mostrar, más recientes primero
+            fh: Archivo de texto abierto para escritura
+        """
+        # La plantilla se genera por partes, que se escriben a medida que salen
+        # agrupadas de a varias para hacer menos llamadas a write()
+        stream = _TEMPLATE.stream(stats=stats, detections=detections, now=datetime.now())
+        stream.enable_buffering()
+        stream.dump(fh)
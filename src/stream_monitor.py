@@ -4,10 +4,17 @@ Monitor de streams que coordina la captura de thumbnails y detección de logos.
 import os
 import json
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from .twitch_client import TwitchClient
 from .logo_detector import LogoDetector
+from . import fast_json
+from .fs_utils import ensure_dir
+
+# Descargas de thumbnails simultáneas como máximo (igual al tamaño del pool
+# de conexiones de TwitchClient, para que cada hilo tenga su conexión)
+MAX_DOWNLOAD_WORKERS = 16
 
 
 class StreamMonitor:
@@ -25,6 +32,9 @@ class StreamMonitor:
         self.twitch_client = TwitchClient()
         self.logo_detector = LogoDetector(logo_path, threshold)
         
+        # Misma sesión HTTP que la API: reutiliza las conexiones al CDN de Twitch
+        self.session = self.twitch_client.session
+        
         # Cargar lista de streamers
         with open(streamers_config_path, 'r', encoding='utf-8') as f:
             config = json.load(f)
@@ -35,26 +45,62 @@ class StreamMonitor:
         self.screenshots_dir = self.reports_dir / 'screenshots'
         self.data_dir = Path('data')
         
-        self.screenshots_dir.mkdir(parents=True, exist_ok=True)
-        self.data_dir.mkdir(parents=True, exist_ok=True)
+        ensure_dir(self.screenshots_dir)
+        ensure_dir(self.data_dir)
         
-        self.detections_file = self.data_dir / 'detections.json'
-        self.detections = self._load_detections()
+        self.detections_file = self.data_dir / 'detections.jsonl'
+        self._migrate_legacy_detections(self.data_dir / 'detections.json')
     
-    def _load_detections(self):
-        """Carga el historial de detecciones desde el archivo JSON."""
-        if self.detections_file.exists():
-            try:
-                with open(self.detections_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                return []
-        return []
+    def _migrate_legacy_detections(self, legacy_file):
+        """
+        Convierte el historial antiguo (un único array JSON) al formato JSON
+        Lines, una detección por línea. Solo se ejecuta una vez.
+        
+        Args:
+            legacy_file: Ruta al archivo detections.json antiguo
+        """
+        if self.detections_file.exists() or not legacy_file.exists():
+            return
+        
+        try:
+            detections = fast_json.loads(legacy_file.read_bytes())
+        except fast_json.JSONDecodeError as e:
+            # No se borra lo único que hay del historial: se aparta para poder
+            # recuperarlo a mano y se empieza un historial nuevo
+            corrupt_file = legacy_file.with_name(legacy_file.name + '.corrupt')
+            os.replace(legacy_file, corrupt_file)
+            print(f"⚠ No se pudo migrar {legacy_file} ({e}), se movió a {corrupt_file}")
+            return
+        
+        tmp_file = self.detections_file.with_name(self.detections_file.name + '.tmp')
+        with open(tmp_file, 'wb') as f:
+            for detection in detections:
+                f.write(fast_json.dumps(detection) + b'\n')
+        os.replace(tmp_file, self.detections_file)
+        legacy_file.unlink()
     
-    def _save_detections(self):
-        """Guarda el historial de detecciones en el archivo JSON."""
-        with open(self.detections_file, 'w', encoding='utf-8') as f:
-            json.dump(self.detections, f, indent=2, ensure_ascii=False)
+    def _save_detections(self, records):
+        """
+        Agrega nuevas detecciones al final del archivo JSON Lines, sin
+        reescribir el historial.
+        
+        Las detecciones se agregan siempre al final con la hora actual, por lo
+        que el archivo queda ordenado cronológicamente (ReportGenerator se
+        apoya en ese orden).
+        
+        Args:
+            records: Lista de detecciones nuevas
+        """
+        with open(self.detections_file, 'ab') as f:
+            # Si una escritura anterior se cortó, la última línea quedó sin
+            # '\n': se termina para que la nueva detección no se pegue a ella
+            if f.tell() > 0:
+                with open(self.detections_file, 'rb') as existing:
+                    existing.seek(-1, os.SEEK_END)
+                    if existing.read(1) != b'\n':
+                        f.write(b'\n')
+            for record in records:
+                f.write(fast_json.dumps(record) + b'\n')
     
     def _download_thumbnail(self, url, output_path):
         """
@@ -70,7 +116,7 @@ class StreamMonitor:
         try:
             # Agregar timestamp para evitar cache
             url_with_timestamp = f"{url}?t={datetime.now().timestamp()}"
-            response = requests.get(url_with_timestamp, timeout=10)
+            response = self.session.get(url_with_timestamp, timeout=10)
             response.raise_for_status()
             
             with open(output_path, 'wb') as f:
@@ -113,38 +159,50 @@ class StreamMonitor:
             'not_live': [s for s in self.streamers if s not in [stream['user_login'] for stream in live_streams]]
         }
         
-        # Procesar cada stream
+        # Generar nombres de archivo únicos y URLs de los thumbnails
+        timestamp_str = datetime.now().strftime('%Y%m%d_%H%M%S')
+        downloads = []
         for stream in live_streams:
-            print(f"Analizando: {stream['user_name']}")
-            print(f"  Título: {stream['title']}")
-            print(f"  Espectadores: {stream['viewer_count']}")
-            
-            # Generar nombres de archivo únicos
-            timestamp_str = datetime.now().strftime('%Y%m%d_%H%M%S')
             username = stream['user_login']
-            
-            thumbnail_filename = f"{username}_{timestamp_str}_thumb.jpg"
-            annotated_filename = f"{username}_{timestamp_str}_detected.jpg"
-            
-            thumbnail_path = self.screenshots_dir / thumbnail_filename
-            annotated_path = self.screenshots_dir / annotated_filename
-            
-            # Descargar thumbnail
             thumbnail_url = self.twitch_client.get_thumbnail_url(
                 stream['thumbnail_url'], 
                 width=1920, 
                 height=1080
             )
+            downloads.append((stream, thumbnail_url,
+                              f"{username}_{timestamp_str}_thumb.jpg",
+                              f"{username}_{timestamp_str}_detected.jpg",
+                              f"{username}_{timestamp_str}_detected.thumb.webp"))
+        
+        # Descargar todos los thumbnails en paralelo: cada descarga pasa casi
+        # todo el tiempo esperando la red
+        with ThreadPoolExecutor(max_workers=min(MAX_DOWNLOAD_WORKERS, len(downloads))) as executor:
+            downloaded = list(executor.map(
+                lambda job: self._download_thumbnail(job[1], self.screenshots_dir / job[2]),
+                downloads))
+        
+        # Detectar el logo, dibujar el resultado y generar la miniatura del
+        # dashboard de todos los thumbnails descargados en paralelo (la imagen
+        # se decodifica una vez por stream)
+        detections = iter(self.logo_detector.detect_and_annotate_many([
+            (self.screenshots_dir / thumbnail_filename,
+             self.screenshots_dir / annotated_filename,
+             self.screenshots_dir / preview_filename)
+            for (_, _, thumbnail_filename, annotated_filename, preview_filename), ok
+            in zip(downloads, downloaded) if ok
+        ]))
+        
+        # Registrar cada stream en el orden original
+        for (stream, _, thumbnail_filename, annotated_filename, preview_filename), ok in zip(downloads, downloaded):
+            print(f"Analizando: {stream['user_name']}")
+            print(f"  Título: {stream['title']}")
+            print(f"  Espectadores: {stream['viewer_count']}")
             
-            if not self._download_thumbnail(thumbnail_url, thumbnail_path):
+            if not ok:
                 print(f"  ✗ Error descargando thumbnail\n")
                 continue
             
-            # Detectar logo
-            detection = self.logo_detector.detect(thumbnail_path)
-            
-            # Dibujar resultado
-            self.logo_detector.draw_detection(thumbnail_path, detection, annotated_path)
+            detection = next(detections)
             
             # Guardar resultado
             detection_record = {
@@ -158,10 +216,10 @@ class StreamMonitor:
                 'confidence': detection['confidence'],
                 'thumbnail': str(thumbnail_filename),
                 'annotated': str(annotated_filename),
+                'preview': str(preview_filename),
                 'started_at': stream['started_at']
             }
             
-            self.detections.append(detection_record)
             results['checked'].append(detection_record)
             
             # Mostrar resultado
@@ -171,8 +229,8 @@ class StreamMonitor:
                 print(f"  ✗ Logo NO detectado (Confianza: {detection['confidence']:.2%})")
             print()
         
-        # Guardar detecciones
-        self._save_detections()
+        # Guardar detecciones nuevas
+        self._save_detections(results['checked'])
         
         print(f"{'='*60}")
         print(f"Chequeo completado")
@@ -3,50 +3,143 @@ Cliente para la API de Twitch que maneja autenticación y consultas de streams.
 """
 import os
 import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from pathlib import Path
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import fast_json
+from .fs_utils import ensure_dir
 
 load_dotenv()
 
+# Consultas simultáneas como máximo a la API de streams (una por lote de 100)
+MAX_BATCH_WORKERS = 8
+
 
 class TwitchClient:
     """Cliente para interactuar con la API de Twitch."""
     
-    def __init__(self):
+    def __init__(self, token_cache_file='data/.twitch_token.json'):
+        """
+        Inicializa el cliente de Twitch.
+        
+        Args:
+            token_cache_file: Archivo donde se guarda el token de acceso para
+                reutilizarlo entre reinicios del bot
+        """
         self.client_id = os.getenv('TWITCH_CLIENT_ID')
         self.client_secret = os.getenv('TWITCH_CLIENT_SECRET')
         self.access_token = None
         self.token_expires_at = None
+        self.token_cache_file = Path(token_cache_file)
+        # Los lotes se consultan en paralelo: el lock evita que varios hilos
+        # pidan un token nuevo a la vez
+        self._token_lock = threading.Lock()
         
         if not self.client_id or not self.client_secret:
             raise ValueError("Las credenciales de Twitch no están configuradas en .env")
+        
+        self._load_cached_token()
+        
+        # Sesión HTTP con conexiones persistentes, compartida con StreamMonitor
+        # para las descargas. Reintenta las consultas ante límites de tasa y
+        # errores temporales del servidor.
+        self.session = requests.Session()
+        retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        self.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16,
+                                                   max_retries=retries))
     
     def _get_access_token(self):
         """Obtiene un token de acceso OAuth de Twitch."""
-        if self.access_token and self.token_expires_at:
-            if datetime.now() < self.token_expires_at:
+        with self._token_lock:
+            if self.access_token and self.token_expires_at:
+                if datetime.now() < self.token_expires_at:
+                    return self.access_token
+            
+            url = "https://id.twitch.tv/oauth2/token"
+            params = {
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+                "grant_type": "client_credentials"
+            }
+            
+            try:
+                response = self.session.post(url, params=params)
+                response.raise_for_status()
+                data = response.json()
+                
+                self.access_token = data['access_token']
+                expires_in = data['expires_in']
+                self.token_expires_at = datetime.now() + timedelta(seconds=expires_in - 300)
+                self._save_cached_token()
+                
                 return self.access_token
+            except requests.exceptions.RequestException as e:
+                print(f"Error obteniendo token de acceso: {e}")
+                return None
+    
+    def _invalidate_token(self, token):
+        """
+        Descarta un token que la API rechazó (revocado o inválido) y lo borra
+        del caché en disco, para que ni este proceso ni un reinicio lo reusen.
         
-        url = "https://id.twitch.tv/oauth2/token"
-        params = {
-            "client_id": self.client_id,
-            "client_secret": self.client_secret,
-            "grant_type": "client_credentials"
-        }
+        Args:
+            token: Token rechazado
+        """
+        with self._token_lock:
+            # Si otro hilo ya lo reemplazó, no hay nada que descartar
+            if self.access_token != token:
+                return
+            self.access_token = None
+            self.token_expires_at = None
+            try:
+                self.token_cache_file.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"No se pudo borrar el token de acceso guardado: {e}")
+    
+    def _load_cached_token(self):
+        """
+        Recupera el token guardado por una ejecución anterior si pertenece al
+        mismo Client ID y le quedan al menos 10 minutos de validez. Los tokens
+        de aplicación duran semanas, así se evita autenticarse en cada reinicio.
+        """
+        try:
+            cached = fast_json.loads(self.token_cache_file.read_bytes())
+            expires_at = datetime.fromisoformat(cached['expires_at'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return
         
+        if cached.get('client_id') != self.client_id:
+            return
+        if expires_at > datetime.now() + timedelta(minutes=10):
+            self.access_token = cached['access_token']
+            self.token_expires_at = expires_at
+    
+    def _save_cached_token(self):
+        """Guarda el token actual para reutilizarlo tras un reinicio."""
+        cached = {
+            'client_id': self.client_id,
+            'access_token': self.access_token,
+            'expires_at': self.token_expires_at.isoformat()
+        }
+        tmp_file = self.token_cache_file.with_name(self.token_cache_file.name + '.tmp')
         try:
-            response = requests.post(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            self.access_token = data['access_token']
-            expires_in = data['expires_in']
-            self.token_expires_at = datetime.now() + timedelta(seconds=expires_in - 300)
-            
-            return self.access_token
-        except requests.exceptions.RequestException as e:
-            print(f"Error obteniendo token de acceso: {e}")
-            return None
+            ensure_dir(self.token_cache_file.parent)
+            # El token es una credencial: el archivo solo lo puede leer el
+            # dueño (se borra un temporal viejo para que el modo se aplique)
+            tmp_file.unlink(missing_ok=True)
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(fast_json.dumps(cached))
+            os.replace(tmp_file, self.token_cache_file)
+        except OSError as e:
+            print(f"No se pudo guardar el token de acceso: {e}")
     
     def get_live_streams(self, usernames):
         """
@@ -62,39 +155,65 @@ class TwitchClient:
         if not token:
             return []
         
+        # La API de Twitch permite hasta 100 usuarios por consulta; los lotes
+        # se piden en paralelo, así la espera total es la de una sola consulta
+        batches = [usernames[i:i+100] for i in range(0, len(usernames), 100)]
+        if not batches:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=min(MAX_BATCH_WORKERS, len(batches))) as executor:
+            results = executor.map(lambda batch: self._fetch_batch(batch, token), batches)
+            return [stream_info for batch_streams in results for stream_info in batch_streams]
+    
+    def _fetch_batch(self, batch, token, retry=True):
+        """
+        Consulta los streams en vivo de un lote de hasta 100 usuarios.
+        
+        Si la API rechaza el token (401), se descarta, se pide uno nuevo y se
+        reintenta el lote una vez.
+        
+        Args:
+            batch: Lista de nombres de usuario
+            token: Token de acceso a usar
+            retry: Si es True, reintenta una vez con un token nuevo ante un 401
+            
+        Returns:
+            Lista de diccionarios con información de streams activos (vacía si
+            la consulta falla)
+        """
+        url = "https://api.twitch.tv/helix/streams"
         headers = {
             "Client-ID": self.client_id,
             "Authorization": f"Bearer {token}"
         }
+        params = {"user_login": batch}
         
-        # La API de Twitch permite hasta 100 usuarios por consulta
-        live_streams = []
-        
-        for i in range(0, len(usernames), 100):
-            batch = usernames[i:i+100]
-            url = "https://api.twitch.tv/helix/streams"
-            params = {"user_login": batch}
-            
-            try:
-                response = requests.get(url, headers=headers, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                for stream in data.get('data', []):
-                    stream_info = {
-                        'user_name': stream['user_name'],
-                        'user_login': stream['user_login'],
-                        'title': stream['title'],
-                        'viewer_count': stream['viewer_count'],
-                        'started_at': stream['started_at'],
-                        'thumbnail_url': stream['thumbnail_url'],
-                        'game_name': stream.get('game_name', 'Sin categoría')
-                    }
-                    live_streams.append(stream_info)
-            except requests.exceptions.RequestException as e:
-                print(f"Error consultando streams: {e}")
-                continue
+        try:
+            response = self.session.get(url, headers=headers, params=params)
+            if response.status_code == 401 and retry:
+                self._invalidate_token(token)
+                new_token = self._get_access_token()
+                if not new_token:
+                    return []
+                return self._fetch_batch(batch, new_token, retry=False)
+            response.raise_for_status()
+            data = response.json()
+        except requests.exceptions.RequestException as e:
+            print(f"Error consultando streams: {e}")
+            return []
         
+        live_streams = []
+        for stream in data.get('data', []):
+            stream_info = {
+                'user_name': stream['user_name'],
+                'user_login': stream['user_login'],
+                'title': stream['title'],
+                'viewer_count': stream['viewer_count'],
+                'started_at': stream['started_at'],
+                'thumbnail_url': stream['thumbnail_url'],
+                'game_name': stream.get('game_name', 'Sin categoría')
+            }
+            live_streams.append(stream_info)
         return live_streams
     
     def get_thumbnail_url(self, thumbnail_template, width=1920, height=1080):
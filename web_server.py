@@ -1,8 +1,9 @@
 """
 Servidor web simple para servir el dashboard en Railway.
 """
-from flask import Flask, send_file, send_from_directory
+from flask import Flask, request, send_file, send_from_directory
 from pathlib import Path
+import sys
 import threading
 import time
 from main import run_monitoring_cycle, cleanup_old_data
@@ -12,20 +13,41 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-app = Flask(__name__)
+# Estilos y logo del dashboard (los genera ReportGenerator en reports/static)
+app = Flask(__name__, static_folder='reports/static')
+
+# Segundos que el navegador puede reutilizar el dashboard sin volver a pedirlo.
+# Pasado ese tiempo lo revalida con su ETag y recibe un 304 si no cambió.
+DASHBOARD_MAX_AGE = 30
+
+# Las capturas no cambian una vez escritas (cada una lleva su fecha en el
+# nombre), así que el navegador puede guardarlas un año sin revalidarlas
+SCREENSHOT_MAX_AGE = 31536000
 
 @app.route('/')
 def index():
-    """Sirve el dashboard HTML."""
+    """Sirve el dashboard HTML (la versión comprimida si el navegador la acepta)."""
     dashboard_path = Path('reports/dashboard.html')
+    compressed_path = Path('reports/dashboard.html.gz')
+    if request.accept_encodings['gzip'] > 0 and compressed_path.exists():
+        response = send_file(compressed_path, mimetype='text/html', max_age=DASHBOARD_MAX_AGE,
+                             download_name='dashboard.html')
+        response.headers['Content-Encoding'] = 'gzip'
+        response.vary.add('Accept-Encoding')
+        return response
     if dashboard_path.exists():
-        return send_file(dashboard_path)
+        response = send_file(dashboard_path, max_age=DASHBOARD_MAX_AGE)
+        response.vary.add('Accept-Encoding')
+        return response
     return "<h1>Dashboard aún no generado. Espera el primer chequeo...</h1>", 404
 
 @app.route('/screenshots/<path:filename>')
 def screenshots(filename):
     """Sirve las capturas de pantalla."""
-    return send_from_directory('reports/screenshots', filename)
+    response = send_from_directory('reports/screenshots', filename, conditional=True,
+                                   max_age=SCREENSHOT_MAX_AGE)
+    response.cache_control.immutable = True
+    return response
 
 def run_bot():
     """Ejecuta el bot en segundo plano."""
@@ -41,17 +63,26 @@ def run_bot():
     schedule.every(check_interval_hours).hours.do(run_monitoring_cycle)
     schedule.every().day.at("03:00").do(cleanup_old_data, days=data_retention_days)
     
-    # Loop del bot
+    # Loop del bot: dormir exactamente hasta la próxima tarea programada
     while True:
+        idle_seconds = schedule.idle_seconds()
+        if idle_seconds is None:
+            break
+        if idle_seconds > 0:
+            time.sleep(idle_seconds)
         schedule.run_pending()
-        time.sleep(60)
 
 if __name__ == '__main__':
-    # Iniciar bot en thread separado
-    bot_thread = threading.Thread(target=run_bot, daemon=True)
-    bot_thread.start()
-    
-    # Iniciar servidor web
-    port = int(os.getenv('PORT', 8080))
-    print(f"🌐 Servidor web iniciado en puerto {port}")
-    app.run(host='0.0.0.0', port=port)
+    if '--bot' in sys.argv:
+        # Solo el bot: en producción gunicorn sirve la web y lanza este
+        # proceso aparte (ver gunicorn.conf.py)
+        run_bot()
+    else:
+        # Desarrollo local: bot en thread separado y servidor de Flask
+        bot_thread = threading.Thread(target=run_bot, daemon=True)
+        bot_thread.start()
+        
+        # Iniciar servidor web
+        port = int(os.getenv('PORT', 8080))
+        print(f"🌐 Servidor web iniciado en puerto {port}")
+        app.run(host='0.0.0.0', port=port)